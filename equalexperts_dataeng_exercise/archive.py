@@ -0,0 +1,167 @@
+import glob
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+import duckdb
+from equalexperts_dataeng_exercise.db import get_connection, setup_schema_and_table, sql_string, SCHEMA_NAME, MAIN_TABLE_NAME, \
+    ARCHIVE_RUNS_TABLE_NAME, ARCHIVE_PARTITIONS_TABLE_NAME, ARCHIVE_TOMBSTONES_TABLE_NAME, WEEKLY_ROLLUP_TABLE_NAME, \
+    BATCH_REPORT_PROFILE
+from equalexperts_dataeng_exercise.outliers import WEEK_NUMBER_MODULO
+
+ARCHIVE_PATH = "archive"
+# A run is rewritten without its replaced votes once they exceed this share of its rows
+ARCHIVE_COMPACTION_SHARE = 0.1
+
+
+def validate_older_than(older_than: str) -> datetime:
+    try:
+        return datetime.fromisoformat(older_than)
+    except ValueError:
+        raise ValueError(f"Invalid date {older_than}, expected an ISO date such as 2022-01-01")
+
+def weekly_totals_query(source: str) -> str:
+    # Must group exactly like the outlier_weeks view, so rolled up weeks line up with the hot ones.
+    return f"""
+        SELECT
+            EXTRACT(YEAR FROM creation_date) AS year,
+            EXTRACT(WEEK FROM creation_date) % {WEEK_NUMBER_MODULO} AS week_number,
+            COUNT(1) AS total_votes
+        FROM {source}
+        GROUP BY year, week_number
+    """
+
+def id_order_key(column: str) -> str:
+    # Orders numeric ids by value rather than as text, so the id ranges of archived years stay narrow.
+    return f"{{'length': length({column}), 'id': {column}}}"
+
+def archive_run_files(archive_path: str, archive_id: int) -> str:
+    return os.path.join(archive_path, "*", f"votes_{archive_id}_*.parquet")
+
+def get_archive_files(conn: duckdb.DuckDBPyConnection, ids_query: Optional[str] = None) -> list[str]:
+    # With ids, only the archived years whose id range holds one of them are returned, so ingestion
+    # reads no Parquet at all for ids newer than the archive, however large it grows.
+    ids_condition = f"""
+        WHERE EXISTS (
+            SELECT 1 FROM ({ids_query}) s
+            WHERE {id_order_key("s.id")} BETWEEN {id_order_key("p.min_id")} AND {id_order_key("p.max_id")}
+        )
+    """ if ids_query else ""
+    rows = conn.execute(f"""
+        SELECT p.files FROM {SCHEMA_NAME}.{ARCHIVE_PARTITIONS_TABLE_NAME} p
+        {ids_condition}
+        ORDER BY p.archive_id, p.year
+    """).fetchall()
+    return [row[0] for row in rows]
+
+def archived_votes_query(archive_files: list[str]) -> str:
+    # Archived rows replaced by a later load are skipped.
+    files = ", ".join(sql_string(archive_file) for archive_file in archive_files)
+    return f"""
+        SELECT a.id, a.user_id, a.post_id, a.vote_type_id, a.bounty_amount, a.creation_date, a.archive_id
+        FROM read_parquet([{files}]) a
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {SCHEMA_NAME}.{ARCHIVE_TOMBSTONES_TABLE_NAME} t
+            WHERE t.id = a.id AND t.archive_id = a.archive_id
+        )
+    """
+
+def copy_to_archive(conn: duckdb.DuckDBPyConnection, votes_query: str, archive_path: str) -> int:
+    # Every run writes its own files, so a run can be read or rewritten without touching the others.
+    # The files are written before the run is registered. If that fails, no partition points at them.
+    archive_id = time.time_ns() // 1000
+    conn.execute(f"""
+        COPY (
+            SELECT *, EXTRACT(YEAR FROM creation_date) AS year, {archive_id}::BIGINT AS archive_id
+            FROM ({votes_query})
+            ORDER BY {id_order_key("id")}
+        ) TO {sql_string(archive_path)} (
+            FORMAT parquet, COMPRESSION zstd, PARTITION_BY (year), APPEND,
+            FILENAME_PATTERN 'votes_{archive_id}_{{uuid}}'
+        );
+    """)
+    return archive_id
+
+def register_archive_run_query(archive_id: int, archive_path: str, older_than: datetime) -> str:
+    files = archive_run_files(archive_path, archive_id)
+    return f"""
+        INSERT INTO {SCHEMA_NAME}.{ARCHIVE_RUNS_TABLE_NAME} (archive_id, path, older_than, archived_at, row_count)
+        SELECT {archive_id}, {sql_string(archive_path)}, TIMESTAMP '{older_than.isoformat(sep=' ')}', now(), COUNT(*)
+        FROM read_parquet({sql_string(files)});
+        INSERT INTO {SCHEMA_NAME}.{ARCHIVE_PARTITIONS_TABLE_NAME} (archive_id, year, files, min_id, max_id, row_count)
+        SELECT
+            {archive_id},
+            year,
+            {sql_string(os.path.join(archive_path, "year="))} || year || '{os.sep}votes_{archive_id}_*.parquet',
+            MIN({id_order_key("id")}).id,
+            MAX({id_order_key("id")}).id,
+            COUNT(*)
+        FROM read_parquet({sql_string(files)}, hive_partitioning = true)
+        GROUP BY year;
+    """
+
+def archive_votes(conn: duckdb.DuckDBPyConnection, archive_path: str, older_than: datetime) -> int:
+    older_than_condition = f"creation_date < TIMESTAMP '{older_than.isoformat(sep=' ')}'"
+    row_count = conn.execute(
+        f"SELECT COUNT(*) FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME} WHERE {older_than_condition}"
+    ).fetchall()[0][0]
+    if row_count == 0:
+        return 0
+
+    archive_id = copy_to_archive(
+        conn, f"SELECT * FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME} WHERE {older_than_condition}", archive_path
+    )
+    conn.begin()
+    conn.execute(f"""
+        {register_archive_run_query(archive_id, archive_path, older_than)}
+        INSERT INTO {SCHEMA_NAME}.{WEEKLY_ROLLUP_TABLE_NAME} (year, week_number, total_votes)
+        {weekly_totals_query(f"(SELECT * FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME} WHERE {older_than_condition})")}
+        ON CONFLICT (year, week_number) DO UPDATE SET total_votes = total_votes + excluded.total_votes;
+        DELETE FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME} WHERE {older_than_condition};
+    """)
+    conn.commit()
+    return row_count
+
+def compact_archive_runs(conn: duckdb.DuckDBPyConnection) -> int:
+    # Runs with many replaced votes are rewritten with just their live rows. The run's tombstones go with
+    # the old files, so neither the tombstones nor the dead rows build up.
+    runs = conn.execute(f"""
+        SELECT r.archive_id, r.path, r.older_than
+        FROM {SCHEMA_NAME}.{ARCHIVE_RUNS_TABLE_NAME} r
+        JOIN (
+            SELECT archive_id, COUNT(*) AS replaced_count
+            FROM {SCHEMA_NAME}.{ARCHIVE_TOMBSTONES_TABLE_NAME}
+            GROUP BY archive_id
+        ) t ON t.archive_id = r.archive_id
+        WHERE t.replaced_count > r.row_count * {ARCHIVE_COMPACTION_SHARE}
+        ORDER BY r.archive_id
+    """).fetchall()
+    for archive_id, archive_path, older_than in runs:
+        old_files = archive_run_files(archive_path, archive_id)
+        live_votes_query = f"""
+            SELECT id, user_id, post_id, vote_type_id, bounty_amount, creation_date
+            FROM ({archived_votes_query([old_files])})
+        """
+        live_count = conn.execute(f"SELECT COUNT(*) FROM ({live_votes_query})").fetchall()[0][0]
+        new_archive_id = copy_to_archive(conn, live_votes_query, archive_path) if live_count else None
+        conn.begin()
+        if new_archive_id:
+            conn.execute(register_archive_run_query(new_archive_id, archive_path, older_than))
+        conn.execute(f"""
+            DELETE FROM {SCHEMA_NAME}.{ARCHIVE_PARTITIONS_TABLE_NAME} WHERE archive_id = {archive_id};
+            DELETE FROM {SCHEMA_NAME}.{ARCHIVE_TOMBSTONES_TABLE_NAME} WHERE archive_id = {archive_id};
+            DELETE FROM {SCHEMA_NAME}.{ARCHIVE_RUNS_TABLE_NAME} WHERE archive_id = {archive_id};
+        """)
+        conn.commit()
+        for old_file in glob.glob(old_files):
+            os.remove(old_file)
+    return len(runs)
+
+def start_archive(warehouse_path: str, older_than: str, archive_path: str = ARCHIVE_PATH) -> int:
+    older_than_date = validate_older_than(older_than)
+    with get_connection(warehouse_path, profile=BATCH_REPORT_PROFILE) as conn:
+        setup_schema_and_table(conn)
+        archived = archive_votes(conn, os.path.abspath(archive_path), older_than_date)
+        compact_archive_runs(conn)
+        return archived
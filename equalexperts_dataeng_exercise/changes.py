@@ -0,0 +1,52 @@
+import duckdb
+from equalexperts_dataeng_exercise.db import SCHEMA_NAME, CHANGES_TABLE_NAME, CHANGES_CONSUMERS_TABLE_NAME
+
+INSERT_OP = "insert"
+REPLACE_OP = "replace"
+
+
+def read_changes_since(conn: duckdb.DuckDBPyConnection, batch_id: int) -> duckdb.DuckDBPyRelation:
+    return conn.sql(f"""
+        SELECT * FROM {SCHEMA_NAME}.{CHANGES_TABLE_NAME}
+        WHERE batch_id > $batch_id
+        ORDER BY batch_id, id
+    """, params={"batch_id": batch_id})
+
+def register_consumer(conn: duckdb.DuckDBPyConnection, consumer: str) -> None:
+    # New consumers start from the oldest change still retained.
+    conn.execute(f"""
+        INSERT INTO {SCHEMA_NAME}.{CHANGES_CONSUMERS_TABLE_NAME} (consumer, last_batch_id)
+        VALUES ($consumer, 0)
+        ON CONFLICT (consumer) DO NOTHING;
+    """, {"consumer": consumer})
+
+def get_latest_batch_id(conn: duckdb.DuckDBPyConnection) -> int:
+    # Truncation only removes the oldest batches, so the log keeps the latest one unless every
+    # consumer has read it, in which case no consumer is behind it either.
+    return conn.execute(f"""
+        SELECT greatest(
+            (SELECT COALESCE(MAX(batch_id), 0) FROM {SCHEMA_NAME}.{CHANGES_TABLE_NAME}),
+            (SELECT COALESCE(MAX(last_batch_id), 0) FROM {SCHEMA_NAME}.{CHANGES_CONSUMERS_TABLE_NAME})
+        )
+    """).fetchall()[0][0]
+
+def commit_consumer_batch(conn: duckdb.DuckDBPyConnection, consumer: str, batch_id: int) -> None:
+    # Committing a batch that does not exist yet would let truncation delete it as soon as it is written.
+    latest_batch_id = get_latest_batch_id(conn)
+    if batch_id > latest_batch_id:
+        raise ValueError(f"Batch {batch_id} does not exist yet, the latest batch is {latest_batch_id}")
+    updated = conn.execute(f"""
+        UPDATE {SCHEMA_NAME}.{CHANGES_CONSUMERS_TABLE_NAME}
+        SET last_batch_id = greatest(last_batch_id, $batch_id)
+        WHERE consumer = $consumer
+        RETURNING consumer;
+    """, {"consumer": consumer, "batch_id": batch_id}).fetchall()
+    if not updated:
+        raise ValueError(f"Consumer {consumer} is not registered")
+
+def truncate_changes(conn: duckdb.DuckDBPyConnection) -> None:
+    # Without registered consumers nothing is known to have been read, so everything is kept.
+    conn.execute(f"""
+        DELETE FROM {SCHEMA_NAME}.{CHANGES_TABLE_NAME}
+        WHERE batch_id <= (SELECT MIN(last_batch_id) FROM {SCHEMA_NAME}.{CHANGES_CONSUMERS_TABLE_NAME});
+    """)
@@ -1,3 +1,6 @@
+import os
+from typing import Optional
+
 import duckdb
 
 WAREHOUSE_PATH = "warehouse.db"
@@ -5,10 +8,72 @@ SCHEMA_NAME = "blog_analysis"
 MAIN_TABLE_NAME = "votes"
 # Dead letter queue table
 DLQ_TABLE_NAME = "votes_dlq"
+# Change log of votes, one batch per ingestion
+CHANGES_TABLE_NAME = "votes_changes"
+CHANGES_BATCH_SEQUENCE_NAME = "votes_changes_batch_id"
+CHANGES_CONSUMERS_TABLE_NAME = "votes_changes_consumers"
+# Votes moved out of the main table into Parquet files, and their weekly totals
+ARCHIVE_RUNS_TABLE_NAME = "votes_archive_runs"
+# Files and id range of every year written by an archive run
+ARCHIVE_PARTITIONS_TABLE_NAME = "votes_archive_partitions"
+ARCHIVE_TOMBSTONES_TABLE_NAME = "votes_archive_tombstones"
+WEEKLY_ROLLUP_TABLE_NAME = "votes_weekly_rollup"
+
+INGEST_PROFILE = "ingest"
+INTERACTIVE_PROFILE = "interactive"
+BATCH_REPORT_PROFILE = "batch-report"
+# DuckDB settings per workload. Each one can be overridden from the environment,
+# e.g. WAREHOUSE_INGEST_MEMORY_LIMIT=4GB or WAREHOUSE_BATCH_REPORT_TEMP_DIRECTORY=/mnt/spill.
+PROFILE_SETTINGS = ("threads", "memory_limit", "temp_directory", "preserve_insertion_order")
+RESOURCE_PROFILES = {
+    # Loads are deduplicated and merged by id, so the order rows arrive in doesn't matter.
+    INGEST_PROFILE: {
+        "preserve_insertion_order": "false",
+    },
+    # Ad hoc queries are small; leave cores and memory for the jobs running alongside them.
+    INTERACTIVE_PROFILE: {
+        "threads": "2",
+        "memory_limit": "1GB",
+    },
+    # Reports and exports scan whole tables. Capping their memory makes large aggregates and sorts
+    # spill to their own directory rather than compete with a load running at the same time.
+    BATCH_REPORT_PROFILE: {
+        "preserve_insertion_order": "false",
+        "memory_limit": "2GB",
+    },
+}
+# Profiles that spill next to the warehouse, like DuckDB's own <warehouse>.tmp, unless temp_directory is overridden
+PROFILE_TEMP_DIRECTORY_SUFFIXES = {
+    BATCH_REPORT_PROFILE: ".batch-report.tmp",
+}
+
+
+def get_profile_config(profile: str) -> dict[str, str]:
+    if profile not in RESOURCE_PROFILES:
+        raise ValueError(f"Unknown resource profile {profile}, expected one of {', '.join(RESOURCE_PROFILES)}")
+    config = dict(RESOURCE_PROFILES[profile])
+    env_prefix = f"WAREHOUSE_{profile.replace('-', '_').upper()}_"
+    for setting in PROFILE_SETTINGS:
+        value = os.environ.get(env_prefix + setting.upper())
+        if value:
+            config[setting] = value
+    return config
 
+def get_connection(warehouse_path: str, read_only: bool = False, profile: Optional[str] = None):
+    config = get_profile_config(profile) if profile else {}
+    if profile in PROFILE_TEMP_DIRECTORY_SUFFIXES and "temp_directory" not in config and warehouse_path != ":memory:":
+        config["temp_directory"] = warehouse_path + PROFILE_TEMP_DIRECTORY_SUFFIXES[profile]
+    return duckdb.connect(warehouse_path, read_only=read_only, config=config)
 
-def get_connection(warehouse_path: str):
-    return duckdb.connect(warehouse_path)
+def sql_string(value: str) -> str:
+    # Paths from the command line end up in SQL string literals, so quotes in them are doubled.
+    return "'" + value.replace("'", "''") + "'"
+
+def table_exists(conn: duckdb.DuckDBPyConnection, table_name: str) -> bool:
+    return conn.execute(f"""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = '{SCHEMA_NAME}' AND table_name = '{table_name}'
+    """).fetchall()[0][0] > 0
 
 def setup_schema_and_table(conn: duckdb.DuckDBPyConnection) -> None:
     conn.sql(f"""
@@ -29,4 +94,46 @@ def setup_schema_and_table(conn: duckdb.DuckDBPyConnection) -> None:
                 bounty_amount DOUBLE,
                 creation_date TIMESTAMP
             );
+            CREATE SEQUENCE IF NOT EXISTS {SCHEMA_NAME}.{CHANGES_BATCH_SEQUENCE_NAME};
+            CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.{CHANGES_TABLE_NAME} (
+                batch_id BIGINT NOT NULL,
+                op STRING NOT NULL,
+                id STRING NOT NULL,
+                user_id STRING,
+                post_id STRING NOT NULL,
+                vote_type_id INTEGER NOT NULL,
+                bounty_amount DOUBLE,
+                creation_date TIMESTAMP NOT NULL,
+                old_creation_date TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.{CHANGES_CONSUMERS_TABLE_NAME} (
+                consumer STRING NOT NULL PRIMARY KEY,
+                last_batch_id BIGINT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.{ARCHIVE_RUNS_TABLE_NAME} (
+                archive_id BIGINT NOT NULL PRIMARY KEY,
+                path STRING NOT NULL,
+                older_than TIMESTAMP NOT NULL,
+                archived_at TIMESTAMP NOT NULL,
+                row_count BIGINT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.{ARCHIVE_PARTITIONS_TABLE_NAME} (
+                archive_id BIGINT NOT NULL,
+                year BIGINT NOT NULL,
+                files STRING NOT NULL,
+                min_id STRING NOT NULL,
+                max_id STRING NOT NULL,
+                row_count BIGINT NOT NULL,
+                PRIMARY KEY (archive_id, year)
+            );
+            CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.{ARCHIVE_TOMBSTONES_TABLE_NAME} (
+                id STRING NOT NULL,
+                archive_id BIGINT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.{WEEKLY_ROLLUP_TABLE_NAME} (
+                year BIGINT NOT NULL,
+                week_number BIGINT NOT NULL,
+                total_votes BIGINT NOT NULL,
+                PRIMARY KEY (year, week_number)
+            );
             """)
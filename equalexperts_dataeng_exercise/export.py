@@ -0,0 +1,117 @@
+import csv
+import importlib.util
+import io
+import re
+import sys
+from typing import BinaryIO, Optional
+
+import duckdb
+from equalexperts_dataeng_exercise.db import get_connection, sql_string, SCHEMA_NAME, BATCH_REPORT_PROFILE
+
+PARQUET_FORMAT = "parquet"
+ARROW_FORMAT = "arrow"
+CSV_FORMAT = "csv"
+EXPORT_FORMATS = (PARQUET_FORMAT, ARROW_FORMAT, CSV_FORMAT)
+BINARY_FORMATS = (PARQUET_FORMAT, ARROW_FORMAT)
+STDOUT_PATH = "-"
+BATCH_SIZE = 100_000
+TABLE_NAME_PATTERN = re.compile(r"^\w+$")
+
+
+def validate_export_format(export_format: str) -> None:
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format {export_format}, expected one of {', '.join(EXPORT_FORMATS)}")
+
+def validate_partitioning(output_path: str, partition_by: Optional[list[str]]) -> None:
+    if partition_by and output_path == STDOUT_PATH:
+        raise ValueError("Partitioned exports must be written to a directory, not stdout")
+
+def validate_stdout(output_path: str, export_format: str, stdout_is_terminal: bool) -> None:
+    if output_path == STDOUT_PATH and stdout_is_terminal and export_format in BINARY_FORMATS:
+        raise ValueError(f"Refusing to write {export_format} to a terminal, pass --output <file> or redirect stdout")
+
+def validate_pyarrow_available(output_path: str, export_format: str) -> None:
+    # pyarrow is optional: COPY covers Parquet and CSV files, and CSV to stdout only needs fetchmany.
+    needs_pyarrow = export_format == ARROW_FORMAT or (export_format == PARQUET_FORMAT and output_path == STDOUT_PATH)
+    if needs_pyarrow and importlib.util.find_spec("pyarrow") is None:
+        destination = "stdout" if output_path == STDOUT_PATH else "a file"
+        raise ValueError(
+            f"Writing {export_format} to {destination} requires pyarrow, install it with 'pip install pyarrow' "
+            f"or export Parquet or CSV to a file"
+        )
+
+def build_source_query(source: str) -> str:
+    # A bare name refers to a table or view in the blog_analysis schema, anything else is run as a query.
+    if TABLE_NAME_PATTERN.match(source):
+        return f"SELECT * FROM {SCHEMA_NAME}.{source}"
+    return source
+
+def export_to_file(conn: duckdb.DuckDBPyConnection, query: str, output_path: str, export_format: str,
+                   partition_by: Optional[list[str]] = None) -> None:
+    if export_format == ARROW_FORMAT:
+        export_arrow_to_file(conn, query, output_path, partition_by)
+        return
+
+    # COPY streams the query result straight to disk, so memory stays bounded by DuckDB's buffers.
+    options = [f"FORMAT {export_format}"]
+    if export_format == CSV_FORMAT:
+        options.append("HEADER true")
+    if partition_by:
+        options.append(f"PARTITION_BY ({', '.join(partition_by)})")
+    conn.execute(f"COPY ({query}) TO {sql_string(output_path)} ({', '.join(options)});")
+
+def export_arrow_to_file(conn: duckdb.DuckDBPyConnection, query: str, output_path: str,
+                         partition_by: Optional[list[str]] = None) -> None:
+    import pyarrow.dataset
+    import pyarrow.ipc
+
+    reader = conn.execute(query).fetch_record_batch(BATCH_SIZE)
+    if partition_by:
+        pyarrow.dataset.write_dataset(
+            reader, output_path, format="ipc", partitioning=partition_by, partitioning_flavor="hive"
+        )
+        return
+    with pyarrow.ipc.new_file(output_path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+
+def export_to_stream(conn: duckdb.DuckDBPyConnection, query: str, stream: BinaryIO, export_format: str) -> None:
+    if export_format == CSV_FORMAT:
+        export_csv_to_stream(conn, query, stream)
+        return
+
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    reader = conn.execute(query).fetch_record_batch(BATCH_SIZE)
+    if export_format == ARROW_FORMAT:
+        writer = pyarrow.ipc.new_stream(stream, reader.schema)
+    else:
+        writer = pyarrow.parquet.ParquetWriter(stream, reader.schema)
+    with writer:
+        for batch in reader:
+            writer.write_batch(batch)
+
+def export_csv_to_stream(conn: duckdb.DuckDBPyConnection, query: str, stream: BinaryIO) -> None:
+    # Plain fetchmany keeps CSV output to stdout free of the optional pyarrow dependency.
+    cursor = conn.execute(query)
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text_stream)
+    writer.writerow([column[0] for column in cursor.description])
+    while rows := cursor.fetchmany(BATCH_SIZE):
+        writer.writerows(rows)
+    text_stream.detach()
+
+def start_export(warehouse_path: str, source: str, output_path: str, export_format: str,
+                 partition_by: Optional[list[str]] = None) -> None:
+    validate_export_format(export_format)
+    validate_partitioning(output_path, partition_by)
+    validate_stdout(output_path, export_format, sys.stdout.isatty())
+    validate_pyarrow_available(output_path, export_format)
+    query = build_source_query(source)
+    # Exports only read, so they can run alongside other read-only connections.
+    with get_connection(warehouse_path, read_only=True, profile=BATCH_REPORT_PROFILE) as conn:
+        if output_path == STDOUT_PATH:
+            export_to_stream(conn, query, sys.stdout.buffer, export_format)
+        else:
+            export_to_file(conn, query, output_path, export_format, partition_by)
@@ -1,12 +1,23 @@
 import sys
 import os
 import duckdb
-from equalexperts_dataeng_exercise.db import get_connection, setup_schema_and_table, SCHEMA_NAME, MAIN_TABLE_NAME, \
-    WAREHOUSE_PATH, DLQ_TABLE_NAME
+from equalexperts_dataeng_exercise.db import get_connection, setup_schema_and_table, sql_string, SCHEMA_NAME, \
+    MAIN_TABLE_NAME, WAREHOUSE_PATH, DLQ_TABLE_NAME, INGEST_PROFILE, CHANGES_TABLE_NAME, CHANGES_BATCH_SEQUENCE_NAME, \
+    ARCHIVE_TOMBSTONES_TABLE_NAME, WEEKLY_ROLLUP_TABLE_NAME
+from equalexperts_dataeng_exercise.archive import archived_votes_query, get_archive_files, weekly_totals_query
+from equalexperts_dataeng_exercise.changes import INSERT_OP, REPLACE_OP, truncate_changes
 
 ARGUMENTS_COUNT = 2
 FILE_PATH_ARGUMENT_INDEX = 1
 STAGE_TABLE_NAME = "votes_stage"
+# Rows of votes, or of its archive, that the current stage table replaces, with their old values
+REPLACED_TABLE_NAME = "votes_stage_replaced"
+VALID_ROW_CONDITION = """
+    id IS NOT NULL AND
+    post_id IS NOT NULL AND
+    vote_type_id IS NOT NULL AND
+    creation_date IS NOT NULL
+"""
 
 
 def validate_arguments(args: list[str]) -> None:
@@ -23,7 +34,7 @@ def create_stage_table_from_file(file_path: str, conn: duckdb.DuckDBPyConnection
         WITH raw AS (
             SELECT * FROM
             read_json_auto(
-                '{file_path}',
+                {sql_string(file_path)},
                 columns={{
                     'Id': 'STRING',
                     'UserId': 'STRING',
@@ -49,7 +60,49 @@ def create_stage_table_from_file(file_path: str, conn: duckdb.DuckDBPyConnection
     conn.execute(stage_table_query)
 
 def update_main_table_from_stage_table(conn: duckdb.DuckDBPyConnection) -> None:
-    insert_query = f"""
+    # The old values of replaced rows are kept for the change log. Archived votes are looked up too,
+    # as they are no longer in votes for the primary key to catch. Only the archived years whose id range
+    # holds a staged id are read.
+    archive_files = get_archive_files(
+        conn, f"SELECT id FROM {SCHEMA_NAME}.{STAGE_TABLE_NAME} WHERE {VALID_ROW_CONDITION}"
+    )
+    archived_replaced_query = f"""
+        UNION ALL
+        SELECT id, creation_date, archive_id
+        FROM ({archived_votes_query(archive_files)})
+        WHERE id IN (SELECT id FROM staged_ids)
+    """ if archive_files else ""
+    upsert_query = f"""
+        CREATE OR REPLACE TABLE {SCHEMA_NAME}.{REPLACED_TABLE_NAME} AS
+        WITH staged_ids AS (
+            SELECT id FROM {SCHEMA_NAME}.{STAGE_TABLE_NAME} WHERE {VALID_ROW_CONDITION}
+        )
+        SELECT id, creation_date, NULL::BIGINT AS archive_id
+        FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME}
+        WHERE id IN (SELECT id FROM staged_ids)
+        {archived_replaced_query};
+        SELECT nextval('{SCHEMA_NAME}.{CHANGES_BATCH_SEQUENCE_NAME}');
+        INSERT INTO {SCHEMA_NAME}.{CHANGES_TABLE_NAME}
+        SELECT
+            currval('{SCHEMA_NAME}.{CHANGES_BATCH_SEQUENCE_NAME}') AS batch_id,
+            CASE WHEN r.id IS NULL THEN '{INSERT_OP}' ELSE '{REPLACE_OP}' END AS op,
+            s.id,
+            s.user_id,
+            s.post_id,
+            s.vote_type_id,
+            s.bounty_amount,
+            s.creation_date,
+            r.creation_date AS old_creation_date
+        FROM (SELECT * FROM {SCHEMA_NAME}.{STAGE_TABLE_NAME} WHERE {VALID_ROW_CONDITION}) s
+        LEFT JOIN {SCHEMA_NAME}.{REPLACED_TABLE_NAME} r ON r.id = s.id;
+        INSERT INTO {SCHEMA_NAME}.{ARCHIVE_TOMBSTONES_TABLE_NAME} (id, archive_id)
+        SELECT id, archive_id FROM {SCHEMA_NAME}.{REPLACED_TABLE_NAME} WHERE archive_id IS NOT NULL;
+        UPDATE {SCHEMA_NAME}.{WEEKLY_ROLLUP_TABLE_NAME} AS rollup
+        SET total_votes = rollup.total_votes - replaced.total_votes
+        FROM ({weekly_totals_query(
+            f"(SELECT * FROM {SCHEMA_NAME}.{REPLACED_TABLE_NAME} WHERE archive_id IS NOT NULL)"
+        )}) replaced
+        WHERE rollup.year = replaced.year AND rollup.week_number = replaced.week_number;
         INSERT OR REPLACE INTO {SCHEMA_NAME}.{MAIN_TABLE_NAME}
             (id, user_id, post_id, vote_type_id, bounty_amount, creation_date)
         WITH valid_data AS (
@@ -61,15 +114,11 @@ def update_main_table_from_stage_table(conn: duckdb.DuckDBPyConnection) -> None:
                 bounty_amount,
                 creation_date
             FROM {SCHEMA_NAME}.{STAGE_TABLE_NAME}
-            WHERE 
-                id IS NOT NULL AND
-                post_id IS NOT NULL AND
-                vote_type_id IS NOT NULL AND
-                creation_date IS NOT NULL
+            WHERE {VALID_ROW_CONDITION}
         )
         select * from valid_data;
     """
-    conn.execute(insert_query)
+    conn.execute(upsert_query)
 
 def update_dlq_from_stage_table(conn: duckdb.DuckDBPyConnection) -> None:
     insert_query = f"""
@@ -102,12 +151,16 @@ def drop_stage_table(conn: duckdb.DuckDBPyConnection) -> None:
 
 def ingest_data(file_path: str, conn: duckdb.DuckDBPyConnection) -> None:
     create_stage_table_from_file(file_path, conn)
+    # votes and its change log change together, so consumers never see a batch that was not applied.
+    conn.begin()
     update_main_table_from_stage_table(conn)
+    truncate_changes(conn)
+    conn.commit()
     update_dlq_from_stage_table(conn)
     # drop_stage_table(conn)
 
-def start_ingestion(warehouse_path: str, file_path: str) -> None:
-    with get_connection(warehouse_path) as conn:
+def start_ingestion(warehouse_path: str, file_path: str, profile: str = INGEST_PROFILE) -> None:
+    with get_connection(warehouse_path, profile=profile) as conn:
         setup_schema_and_table(conn)
         ingest_data(file_path, conn)
 
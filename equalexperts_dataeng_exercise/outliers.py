@@ -1,21 +1,36 @@
 import duckdb
-from equalexperts_dataeng_exercise.db import get_connection, SCHEMA_NAME, MAIN_TABLE_NAME, WAREHOUSE_PATH
+from equalexperts_dataeng_exercise.db import get_connection, table_exists, SCHEMA_NAME, MAIN_TABLE_NAME, \
+    WAREHOUSE_PATH, BATCH_REPORT_PROFILE, WEEKLY_ROLLUP_TABLE_NAME
 
 OUTLIER_WEEKS_VIEW_NAME = "outlier_weeks"
 OUTLIER_THRESHOLD = 0.2
 WEEK_NUMBER_MODULO = 52
 
 
-def create_outliers_view(conn: duckdb.Connection) -> None:
+def create_outliers_view(conn: duckdb.DuckDBPyConnection, include_rollup: bool = True) -> None:
+    # Archived votes only survive as weekly totals in the rollup table
+    rollup_query = f"""
+                UNION ALL
+                SELECT year, week_number, total_votes FROM {SCHEMA_NAME}.{WEEKLY_ROLLUP_TABLE_NAME}
+    """ if include_rollup else ""
     sql = f"""
         CREATE OR REPLACE VIEW {SCHEMA_NAME}.{OUTLIER_WEEKS_VIEW_NAME} AS
-        WITH weekly_total AS (
+        WITH hot_weekly_total AS (
             SELECT 
                 EXTRACT(YEAR FROM creation_date) AS year, 
                 EXTRACT(WEEK FROM creation_date) % {WEEK_NUMBER_MODULO} AS week_number,
                 COUNT(1) AS total_votes 
             FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME} 
             GROUP BY year, week_number 
+        ),
+        weekly_total AS (
+            SELECT year, week_number, CAST(SUM(total_votes) AS BIGINT) AS total_votes
+            FROM (
+                SELECT * FROM hot_weekly_total
+                {rollup_query}
+            )
+            GROUP BY year, week_number
+            HAVING SUM(total_votes) > 0
             ORDER BY year, week_number ASC
         ),
         average_votes AS (
@@ -30,12 +45,15 @@ def create_outliers_view(conn: duckdb.Connection) -> None:
     """
     conn.execute(sql)
 
-def get_outlier_weeks(conn: duckdb.Connection) -> None:
-    print(conn.sql(f"SELECT * FROM {SCHEMA_NAME}.{OUTLIER_WEEKS_VIEW_NAME}").fetchdf())
+def get_outlier_weeks(conn: duckdb.DuckDBPyConnection) -> None:
+    # Printing the relation uses DuckDB's own renderer, so pandas is never imported.
+    print(conn.sql(f"SELECT * FROM {SCHEMA_NAME}.{OUTLIER_WEEKS_VIEW_NAME}"))
 
-def compute_outliers(warehouse_path: str) -> None:
-    with get_connection(warehouse_path) as conn:
-        create_outliers_view(conn)
+def compute_outliers(warehouse_path: str, profile: str = BATCH_REPORT_PROFILE) -> None:
+    # The report never creates tables, they come from ingestion and archiving. A warehouse from before
+    # archiving existed has no rollup.
+    with get_connection(warehouse_path, profile=profile) as conn:
+        create_outliers_view(conn, include_rollup=table_exists(conn, WEEKLY_ROLLUP_TABLE_NAME))
         get_outlier_weeks(conn)
 
 if __name__ == "__main__":
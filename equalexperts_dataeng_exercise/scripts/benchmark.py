@@ -0,0 +1,186 @@
+"""
+Benchmarks for the exercise. Run with 'poetry run exercise benchmark'.
+
+The start-up cases run in a fresh interpreter, so the timings include Python
+start-up and every import the command needs, which is what a user of the CLI
+pays for. They run in a temporary working directory seeded with synthetic
+votes, so the warehouse and data in the current directory are left alone.
+
+The ingestion cases load a synthetic history and then time a daily load in
+which nearly all ids are new. They compare the full ingestion with a bare
+upsert into the same primary-key indexed votes table, which shows the cost of
+the change log and the archive lookups.
+
+The profile cases run ingestion and the outlier report under each DuckDB
+resource profile, each in its own interpreter so that peak memory is measured
+per case. The time is taken inside that interpreter, around the workload only,
+but peak memory includes the interpreter and its imports. Thread settings only
+make a difference on a machine with more than one CPU.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPEATS = 5
+CLI_MODULE = "equalexperts_dataeng_exercise.scripts.exercise"
+HISTORY_ROWS = 2_000_000
+DAILY_ROWS = 200_000
+# Share of the daily load that repeats ids already in the history
+DAILY_OVERLAP = 0.01
+# Roughly the size of the real votes file
+STARTUP_ROWS = 40_000
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Import and call of each workload, the call is timed in the child interpreter
+PROFILE_WORKLOADS = {
+    "ingest": (
+        "from equalexperts_dataeng_exercise.ingest import start_ingestion",
+        "start_ingestion({warehouse_path!r}, {data_path!r}, {profile!r})",
+    ),
+    "outliers": (
+        "from equalexperts_dataeng_exercise.outliers import compute_outliers",
+        "compute_outliers({warehouse_path!r}, {profile!r})",
+    ),
+}
+PROFILE_WORKLOAD_CODE = """
+import resource
+import time
+{setup}
+tic = time.perf_counter()
+{call}
+elapsed = time.perf_counter() - tic
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+# ingest-data runs before detect-outliers, so the report has a warehouse to read
+STARTUP_CASES = {
+    "python start-up": [sys.executable, "-c", "pass"],
+    "import cli": [sys.executable, "-c", f"import {CLI_MODULE}"],
+    "exercise --help": [sys.executable, "-m", CLI_MODULE, "--help"],
+    "exercise ingest-data": [sys.executable, "-m", CLI_MODULE, "ingest-data"],
+    "exercise detect-outliers": [sys.executable, "-m", CLI_MODULE, "detect-outliers"],
+}
+
+
+def time_command(args: list[str], repeats: int, cwd: str) -> list[float]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [PACKAGE_ROOT, os.environ.get("PYTHONPATH")]))}
+    timings = []
+    for _ in range(repeats):
+        tic = time.perf_counter()
+        subprocess.run(args=args, capture_output=True, check=True, cwd=cwd, env=env)
+        timings.append(time.perf_counter() - tic)
+    return timings
+
+
+def benchmark_startup(repeats: int = REPEATS, row_count: int = STARTUP_ROWS) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "uncommitted"))
+        write_synthetic_votes(os.path.join(directory, "uncommitted", "votes.jsonl"), 0, row_count)
+        print(f"{'case':<28}{'min (s)':>10}{'median (s)':>12}")
+        for name, args in STARTUP_CASES.items():
+            timings = time_command(args, repeats, directory)
+            print(f"{name:<28}{min(timings):>10.3f}{statistics.median(timings):>12.3f}")
+
+
+def write_synthetic_votes(file_path: str, first_id: int, row_count: int) -> None:
+    import duckdb
+
+    duckdb.execute(f"""
+        COPY (
+            SELECT
+                CAST(i AS STRING) AS Id,
+                CASE WHEN i % 3 = 0 THEN CAST(i % 50000 AS STRING) END AS UserId,
+                CAST(i % 100000 AS STRING) AS PostId,
+                CAST(1 + i % 16 AS STRING) AS VoteTypeId,
+                strftime(TIMESTAMP '2015-01-01' + to_seconds(i * 60), '%Y-%m-%dT%H:%M:%S.000') AS CreationDate
+            FROM range({first_id}, {first_id + row_count}) t(i)
+        ) TO '{file_path}' (FORMAT json);
+    """)
+
+
+def write_synthetic_dataset(directory: str, history_rows: int, daily_rows: int, daily_overlap: float) -> tuple[str, str]:
+    history_path = os.path.join(directory, "history.jsonl")
+    daily_path = os.path.join(directory, "daily.jsonl")
+    write_synthetic_votes(history_path, 0, history_rows)
+    write_synthetic_votes(daily_path, history_rows - int(daily_rows * daily_overlap), daily_rows)
+    return history_path, daily_path
+
+
+def ingest_with_bare_upsert(warehouse_path: str, file_path: str) -> None:
+    from equalexperts_dataeng_exercise.db import get_connection, MAIN_TABLE_NAME, SCHEMA_NAME
+    from equalexperts_dataeng_exercise.ingest import create_stage_table_from_file, STAGE_TABLE_NAME
+
+    with get_connection(warehouse_path) as conn:
+        conn.execute(f"""
+            CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME};
+            CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.{MAIN_TABLE_NAME} (
+                id STRING NOT NULL PRIMARY KEY,
+                user_id STRING,
+                post_id STRING NOT NULL,
+                vote_type_id INTEGER NOT NULL,
+                bounty_amount DOUBLE,
+                creation_date TIMESTAMP NOT NULL
+            );
+        """)
+        create_stage_table_from_file(file_path, conn)
+        conn.execute(f"""
+            INSERT OR REPLACE INTO {SCHEMA_NAME}.{MAIN_TABLE_NAME}
+            SELECT * FROM {SCHEMA_NAME}.{STAGE_TABLE_NAME} WHERE id IS NOT NULL;
+        """)
+
+
+def benchmark_ingestion(history_rows: int = HISTORY_ROWS, daily_rows: int = DAILY_ROWS,
+                        daily_overlap: float = DAILY_OVERLAP) -> None:
+    from equalexperts_dataeng_exercise.ingest import start_ingestion
+
+    strategies = {
+        "bare upsert": ingest_with_bare_upsert,
+        "ingestion": start_ingestion,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        history_path, daily_path = write_synthetic_dataset(directory, history_rows, daily_rows, daily_overlap)
+        print(f"history {history_rows} rows, daily load {daily_rows} rows with {daily_overlap:.0%} existing ids")
+        print(f"{'strategy':<28}{'history (s)':>12}{'daily (s)':>12}")
+        for name, ingest in strategies.items():
+            warehouse_path = os.path.join(directory, f"{name.replace(' ', '_')}.db")
+            tic = time.perf_counter()
+            ingest(warehouse_path, history_path)
+            toc = time.perf_counter()
+            ingest(warehouse_path, daily_path)
+            print(f"{name:<28}{toc - tic:>12.3f}{time.perf_counter() - toc:>12.3f}")
+
+
+def run_profile_workload(setup: str, call: str) -> tuple[float, int]:
+    result = subprocess.run(
+        args=[sys.executable, "-c", PROFILE_WORKLOAD_CODE.format(setup=setup, call=call)],
+        capture_output=True, text=True, check=True
+    )
+    elapsed, peak_kib = result.stdout.split()[-2:]
+    # ru_maxrss is reported in KiB on Linux
+    return float(elapsed), int(peak_kib)
+
+
+def benchmark_profiles(history_rows: int = HISTORY_ROWS) -> None:
+    from equalexperts_dataeng_exercise.db import RESOURCE_PROFILES
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, "history.jsonl")
+        write_synthetic_votes(data_path, 0, history_rows)
+        print(f"{history_rows} synthetic votes on {os.cpu_count()} CPU(s)")
+        if os.cpu_count() == 1:
+            print("a single CPU runs every profile on one thread, so thread settings are not compared")
+        print(f"{'profile':<16}{'workload':<12}{'time (s)':>10}{'rows/s':>12}{'peak (MiB)':>12}")
+        for profile in RESOURCE_PROFILES:
+            warehouse_path = os.path.join(directory, f"{profile}.db")
+            for workload, (setup, call) in PROFILE_WORKLOADS.items():
+                elapsed, peak_kib = run_profile_workload(
+                    setup, call.format(warehouse_path=warehouse_path, data_path=data_path, profile=profile)
+                )
+                print(f"{profile:<16}{workload:<12}{elapsed:>10.3f}{history_rows / elapsed:>12.0f}{peak_kib / 1024:>12.0f}")
+
+if __name__ == "__main__":
+    benchmark_startup()
+    benchmark_ingestion()
+    benchmark_profiles()
@@ -11,11 +11,14 @@ For example
     poetry run exercise detect-outliers
     poetry run exercise test
 
+The data commands run in-process and import their modules lazily, so that
+commands like `--help` or `lint` don't pay for loading DuckDB.
+
 """
 import subprocess
 from pathlib import Path
+from typing import List, Optional
 
-import duckdb
 import typer
 
 app = typer.Typer()
@@ -48,25 +51,86 @@ def test():
 
 @app.command()
 def fetch_data():
-    run_cmd("python -m equalexperts_dataeng_exercise.scripts.fetch_data")
+    from equalexperts_dataeng_exercise.scripts.fetch_data import download_data
+
+    download_data()
 
 
 @app.command()
 def ingest_data():
-    path_to_data = Path("uncommitted") / "votes.jsonl"
-    run_cmd(f"python -m equalexperts_dataeng_exercise.ingest {path_to_data}")
+    from equalexperts_dataeng_exercise.db import WAREHOUSE_PATH
+    from equalexperts_dataeng_exercise.ingest import start_ingestion, validate_file_path
+
+    path_to_data = str(Path("uncommitted") / "votes.jsonl")
+    validate_file_path(path_to_data)
+    start_ingestion(WAREHOUSE_PATH, path_to_data)
 
 
 @app.command()
 def run_query(query: str):
-    conn = duckdb.connect("warehouse.db")
-    result = conn.sql(query)
-    result.show()
+    from equalexperts_dataeng_exercise.db import INTERACTIVE_PROFILE, WAREHOUSE_PATH, get_connection
+
+    with get_connection(WAREHOUSE_PATH, profile=INTERACTIVE_PROFILE) as conn:
+        result = conn.sql(query)
+        if result is not None:
+            print(result)
+
+
+@app.command()
+def export(
+    source: str,
+    output: str = typer.Option(..., help="File or directory to write to, '-' for stdout"),
+    format: str = typer.Option("parquet", help="parquet, arrow or csv"),
+    partition_by: Optional[List[str]] = typer.Option(None, help="Column to partition the output by"),
+):
+    """
+    Export a table or view of blog_analysis, or the result of a query.
+    """
+    from equalexperts_dataeng_exercise.db import WAREHOUSE_PATH
+    from equalexperts_dataeng_exercise.export import start_export
+
+    start_export(WAREHOUSE_PATH, source, output, format, partition_by)
+
+
+@app.command()
+def archive(
+    older_than: str = typer.Option(..., help="Archive votes created before this ISO date"),
+    path: str = typer.Option("archive", help="Directory of the year-partitioned Parquet archive"),
+):
+    """
+    Move old votes to Parquet files, keeping their weekly totals in the warehouse.
+    """
+    from equalexperts_dataeng_exercise.archive import start_archive
+    from equalexperts_dataeng_exercise.db import WAREHOUSE_PATH
+
+    archived = start_archive(WAREHOUSE_PATH, older_than, path)
+    print(f"Archived {archived} votes to {path}")
 
 
 @app.command()
 def detect_outliers():
-    run_cmd("python -m equalexperts_dataeng_exercise.outliers")
+    from equalexperts_dataeng_exercise.db import WAREHOUSE_PATH
+    from equalexperts_dataeng_exercise.outliers import compute_outliers
+
+    compute_outliers(WAREHOUSE_PATH)
+
+
+@app.command()
+def benchmark(
+    ingestion: bool = typer.Option(False, help="Also benchmark ingestion on synthetic data"),
+    profiles: bool = typer.Option(False, help="Also benchmark each resource profile on synthetic data"),
+):
+    from equalexperts_dataeng_exercise.scripts.benchmark import (
+        benchmark_ingestion,
+        benchmark_profiles,
+        benchmark_startup,
+    )
+
+    benchmark_startup()
+    if ingestion:
+        benchmark_ingestion()
+    if profiles:
+        benchmark_profiles()
 
 
 @app.command()
@@ -5,8 +5,6 @@ import tarfile
 import tempfile
 from pathlib import Path
 
-import requests
-
 DATA_URL = (
     "https://drive.google.com/uc?export=download&id=1jLcE2Jw1znaBy7FD7XCme_My_1PTZk17"
 )
@@ -24,6 +22,8 @@ logger.addHandler(handler)
 
 
 def download_and_extract(url: str):
+    import requests
+
     with tempfile.TemporaryFile() as tmp:
         logger.info("Downloading %s", url)
         with requests.get(url, stream=True) as download_stream:
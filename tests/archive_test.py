@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import duckdb
+
+from equalexperts_dataeng_exercise.archive import (
+    archived_votes_query,
+    get_archive_files,
+    start_archive,
+    validate_older_than,
+    weekly_totals_query
+)
+from equalexperts_dataeng_exercise.db import (
+    SCHEMA_NAME,
+    MAIN_TABLE_NAME,
+    ARCHIVE_PARTITIONS_TABLE_NAME,
+    ARCHIVE_TOMBSTONES_TABLE_NAME,
+    WEEKLY_ROLLUP_TABLE_NAME
+)
+from equalexperts_dataeng_exercise.ingest import start_ingestion, update_main_table_from_stage_table
+from equalexperts_dataeng_exercise.outliers import compute_outliers, OUTLIER_WEEKS_VIEW_NAME, WEEK_NUMBER_MODULO
+from tests.db_test import WAREHOUSE_PATH
+
+SAMPLE_FILE_PATH = "tests/test-resources/samples-votes.jsonl"
+SAMPLE_ROW_COUNT = 16
+EXPECTED_OUTLIER_WEEKS = [
+    (2022, 0, 1), (2022, 1, 3), (2022, 2, 3), (2022, 5, 1), (2022, 6, 1), (2022, 8, 1)
+]
+
+
+class TestValidateOlderThan(unittest.TestCase):
+
+    def test_validate_older_than_parses_iso_date(self):
+        assert validate_older_than("2022-01-16").isoformat() == "2022-01-16T00:00:00"
+
+    def test_validate_older_than_with_invalid_date_raises_value_error(self):
+        with self.assertRaises(ValueError) as context:
+            validate_older_than("last week")
+        assert "Invalid date last week" in str(context.exception)
+
+
+class TestWeeklyTotalsQuery(unittest.TestCase):
+
+    def test_weekly_totals_query_groups_like_outlier_weeks(self):
+        sql = weekly_totals_query("source")
+
+        assert "EXTRACT(YEAR FROM creation_date) AS year" in sql
+        assert f"EXTRACT(WEEK FROM creation_date) % {WEEK_NUMBER_MODULO} AS week_number" in sql
+        assert "FROM source" in sql
+
+
+class TestUpdateMainTableWithArchive(unittest.TestCase):
+
+    def test_update_main_table_from_stage_table_looks_up_archived_votes(self):
+        mock_conn = Mock()
+        mock_conn.execute.return_value.fetchall.return_value = [("/data/archive/year=2022/votes_1_*.parquet",)]
+        update_main_table_from_stage_table(mock_conn)
+
+        files_query = mock_conn.execute.call_args_list[0][0][0]
+        assert f"FROM {SCHEMA_NAME}.{ARCHIVE_PARTITIONS_TABLE_NAME}" in files_query
+        assert "BETWEEN" in files_query
+        sql_call = mock_conn.execute.call_args[0][0]
+        assert "read_parquet(['/data/archive/year=2022/votes_1_*.parquet'])" in sql_call
+        assert f"INSERT INTO {SCHEMA_NAME}.{ARCHIVE_TOMBSTONES_TABLE_NAME}" in sql_call
+        assert f"UPDATE {SCHEMA_NAME}.{WEEKLY_ROLLUP_TABLE_NAME}" in sql_call
+
+
+class TestArchiveIntegration(unittest.TestCase):
+
+    def setUp(self):
+        if os.path.exists(WAREHOUSE_PATH):
+            os.remove(WAREHOUSE_PATH)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+        self.archive_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        if os.path.exists(WAREHOUSE_PATH):
+            os.remove(WAREHOUSE_PATH)
+        shutil.rmtree(self.archive_path)
+
+    def _outlier_weeks(self) -> list[tuple]:
+        compute_outliers(WAREHOUSE_PATH)
+        with duckdb.connect(WAREHOUSE_PATH, read_only=True) as conn:
+            return conn.sql(f"SELECT * FROM {SCHEMA_NAME}.{OUTLIER_WEEKS_VIEW_NAME}").fetchall()
+
+    def _count_hot_and_archived_votes(self) -> tuple[int, int]:
+        with duckdb.connect(WAREHOUSE_PATH, read_only=True) as conn:
+            hot = conn.sql(f"SELECT COUNT(*) FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME}").fetchall()[0][0]
+            archive_files = get_archive_files(conn)
+            archived = conn.sql(
+                f"SELECT COUNT(*) FROM ({archived_votes_query(archive_files)})"
+            ).fetchall()[0][0] if archive_files else 0
+        return hot, archived
+
+    def test_archive_moves_old_votes_to_year_partitioned_parquet(self):
+        archived = start_archive(WAREHOUSE_PATH, "2022-01-16", self.archive_path)
+
+        assert archived == 4
+        assert os.listdir(self.archive_path) == ["year=2022"]
+        assert self._count_hot_and_archived_votes() == (SAMPLE_ROW_COUNT - 4, 4)
+
+    def test_archive_to_path_with_quote_can_be_read_back(self):
+        archive_path = os.path.join(self.archive_path, "o'brien")
+        start_archive(WAREHOUSE_PATH, "2022-02-01", archive_path)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+
+        assert self._count_hot_and_archived_votes() == (SAMPLE_ROW_COUNT, 0)
+
+    def test_archive_with_nothing_to_archive_writes_no_files(self):
+        assert start_archive(WAREHOUSE_PATH, "2000-01-01", self.archive_path) == 0
+        assert os.listdir(self.archive_path) == []
+
+    def test_outlier_weeks_are_unchanged_by_archiving(self):
+        start_archive(WAREHOUSE_PATH, "2022-02-01", self.archive_path)
+
+        assert self._outlier_weeks() == EXPECTED_OUTLIER_WEEKS
+
+    def test_ingesting_archived_ids_replaces_them_without_duplicates(self):
+        start_archive(WAREHOUSE_PATH, "2022-02-01", self.archive_path)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+
+        assert self._count_hot_and_archived_votes() == (SAMPLE_ROW_COUNT, 0)
+        assert self._outlier_weeks() == EXPECTED_OUTLIER_WEEKS
+
+    def test_votes_can_be_archived_again_after_being_replaced(self):
+        start_archive(WAREHOUSE_PATH, "2022-02-01", self.archive_path)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+        start_archive(WAREHOUSE_PATH, "2022-02-01", self.archive_path)
+
+        hot, archived = self._count_hot_and_archived_votes()
+        assert hot + archived == SAMPLE_ROW_COUNT
+        assert self._outlier_weeks() == EXPECTED_OUTLIER_WEEKS
+
+    def test_archive_files_are_only_returned_for_ids_in_their_range(self):
+        start_archive(WAREHOUSE_PATH, "2022-01-16", self.archive_path)
+
+        with duckdb.connect(WAREHOUSE_PATH, read_only=True) as conn:
+            all_files = get_archive_files(conn)
+            archived_id = conn.sql(
+                f"SELECT MIN(id) FROM ({archived_votes_query(all_files)})"
+            ).fetchall()[0][0]
+            assert len(all_files) == 1
+            assert get_archive_files(conn, f"SELECT '{archived_id}' AS id") == all_files
+            assert get_archive_files(conn, "SELECT '999999999' AS id") == []
+
+    def test_archiving_again_compacts_runs_with_replaced_votes(self):
+        start_archive(WAREHOUSE_PATH, "2022-02-01", self.archive_path)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+        start_archive(WAREHOUSE_PATH, "2022-02-01", self.archive_path)
+
+        with duckdb.connect(WAREHOUSE_PATH, read_only=True) as conn:
+            tombstones = conn.sql(
+                f"SELECT COUNT(*) FROM {SCHEMA_NAME}.{ARCHIVE_TOMBSTONES_TABLE_NAME}"
+            ).fetchall()[0][0]
+            archive_files = get_archive_files(conn)
+        assert tombstones == 0
+        assert len(archive_files) == 1
+        assert len(os.listdir(os.path.join(self.archive_path, "year=2022"))) == 1
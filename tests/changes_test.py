@@ -0,0 +1,119 @@
+import os
+import unittest
+from unittest.mock import Mock
+
+from equalexperts_dataeng_exercise.changes import (
+    commit_consumer_batch,
+    get_latest_batch_id,
+    read_changes_since,
+    register_consumer,
+    truncate_changes,
+    INSERT_OP,
+    REPLACE_OP
+)
+from equalexperts_dataeng_exercise.db import (
+    get_connection,
+    SCHEMA_NAME,
+    CHANGES_TABLE_NAME,
+    CHANGES_CONSUMERS_TABLE_NAME
+)
+from equalexperts_dataeng_exercise.ingest import start_ingestion
+from tests.db_test import WAREHOUSE_PATH
+
+SAMPLE_FILE_PATH = "tests/test-resources/samples-votes.jsonl"
+SAMPLE_ROW_COUNT = 16
+
+
+class TestTruncateChanges(unittest.TestCase):
+
+    def test_truncate_changes_deletes_up_to_slowest_consumer(self):
+        mock_conn = Mock()
+        truncate_changes(mock_conn)
+
+        mock_conn.execute.assert_called_once()
+        sql_call = mock_conn.execute.call_args[0][0]
+
+        assert f"DELETE FROM {SCHEMA_NAME}.{CHANGES_TABLE_NAME}" in sql_call
+        assert f"SELECT MIN(last_batch_id) FROM {SCHEMA_NAME}.{CHANGES_CONSUMERS_TABLE_NAME}" in sql_call
+
+
+class TestChangesIntegration(unittest.TestCase):
+
+    def setUp(self):
+        if os.path.exists(WAREHOUSE_PATH):
+            os.remove(WAREHOUSE_PATH)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+
+    def tearDown(self):
+        if os.path.exists(WAREHOUSE_PATH):
+            os.remove(WAREHOUSE_PATH)
+
+    def _count_changes_by_batch(self) -> list[tuple]:
+        with get_connection(WAREHOUSE_PATH) as conn:
+            return conn.sql(f"""
+                SELECT batch_id, op, COUNT(*) FROM {SCHEMA_NAME}.{CHANGES_TABLE_NAME}
+                GROUP BY batch_id, op ORDER BY batch_id
+            """).fetchall()
+
+    def test_ingestion_logs_inserts_then_replaces_with_old_creation_date(self):
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+
+        assert self._count_changes_by_batch() == [
+            (1, INSERT_OP, SAMPLE_ROW_COUNT), (2, REPLACE_OP, SAMPLE_ROW_COUNT)
+        ]
+        with get_connection(WAREHOUSE_PATH) as conn:
+            old_creation_dates = conn.sql(f"""
+                SELECT COUNT(*) FROM {SCHEMA_NAME}.{CHANGES_TABLE_NAME}
+                WHERE op = '{REPLACE_OP}' AND old_creation_date = creation_date
+            """).fetchall()[0][0]
+        assert old_creation_dates == SAMPLE_ROW_COUNT
+
+    def test_read_changes_since_returns_only_later_batches(self):
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+
+        with get_connection(WAREHOUSE_PATH) as conn:
+            changes = read_changes_since(conn, 1).fetchall()
+        assert len(changes) == SAMPLE_ROW_COUNT
+        assert {change[0] for change in changes} == {2}
+
+    def test_changes_are_kept_until_every_consumer_has_read_them(self):
+        with get_connection(WAREHOUSE_PATH) as conn:
+            register_consumer(conn, "mirror")
+            register_consumer(conn, "weekly_totals")
+            commit_consumer_batch(conn, "mirror", 1)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+        assert [batch[0] for batch in self._count_changes_by_batch()] == [1, 2]
+
+        with get_connection(WAREHOUSE_PATH) as conn:
+            commit_consumer_batch(conn, "weekly_totals", 1)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+        assert [batch[0] for batch in self._count_changes_by_batch()] == [2, 3]
+
+    def test_commit_consumer_batch_for_unknown_consumer_raises_value_error(self):
+        with get_connection(WAREHOUSE_PATH) as conn:
+            with self.assertRaises(ValueError) as context:
+                commit_consumer_batch(conn, "unknown", 1)
+        assert "Consumer unknown is not registered" in str(context.exception)
+
+    def test_commit_consumer_batch_past_the_latest_batch_raises_value_error(self):
+        with get_connection(WAREHOUSE_PATH) as conn:
+            register_consumer(conn, "mirror")
+            with self.assertRaises(ValueError) as context:
+                commit_consumer_batch(conn, "mirror", 99)
+        assert "Batch 99 does not exist yet, the latest batch is 1" in str(context.exception)
+
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+        assert [batch[0] for batch in self._count_changes_by_batch()] == [1, 2]
+
+    def test_get_latest_batch_id_after_truncation(self):
+        with get_connection(WAREHOUSE_PATH) as conn:
+            register_consumer(conn, "mirror")
+            commit_consumer_batch(conn, "mirror", 1)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+        with get_connection(WAREHOUSE_PATH) as conn:
+            commit_consumer_batch(conn, "mirror", 2)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+
+        with get_connection(WAREHOUSE_PATH) as conn:
+            assert get_latest_batch_id(conn) == 3
+        assert [batch[0] for batch in self._count_changes_by_batch()] == [3]
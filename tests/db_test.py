@@ -1,10 +1,18 @@
+import os
 import unittest
 from unittest.mock import Mock, patch
 from equalexperts_dataeng_exercise.db import (
     get_connection,
+    get_profile_config,
+    INGEST_PROFILE,
+    INTERACTIVE_PROFILE,
     setup_schema_and_table,
+    sql_string,
     SCHEMA_NAME,
-    MAIN_TABLE_NAME
+    MAIN_TABLE_NAME,
+    CHANGES_TABLE_NAME,
+    CHANGES_CONSUMERS_TABLE_NAME,
+    ARCHIVE_PARTITIONS_TABLE_NAME
 )
 WAREHOUSE_PATH = "test_warehouse.db"
 
@@ -18,9 +26,74 @@ class TestGetConnection(unittest.TestCase):
         
         result = get_connection(WAREHOUSE_PATH)
         
-        mock_connect.assert_called_once_with(WAREHOUSE_PATH)
+        mock_connect.assert_called_once_with(WAREHOUSE_PATH, read_only=False, config={})
         assert result == mock_conn
 
+    @patch('equalexperts_dataeng_exercise.db.duckdb.connect')
+    def test_get_connection_passes_read_only_flag(self, mock_connect):
+        get_connection(WAREHOUSE_PATH, read_only=True)
+
+        mock_connect.assert_called_once_with(WAREHOUSE_PATH, read_only=True, config={})
+
+    @patch('equalexperts_dataeng_exercise.db.duckdb.connect')
+    def test_get_connection_applies_profile_config(self, mock_connect):
+        get_connection(WAREHOUSE_PATH, profile=INGEST_PROFILE)
+
+        mock_connect.assert_called_once_with(
+            WAREHOUSE_PATH, read_only=False, config={"preserve_insertion_order": "false"}
+        )
+
+    @patch('equalexperts_dataeng_exercise.db.duckdb.connect')
+    def test_get_connection_spills_batch_report_next_to_the_warehouse(self, mock_connect):
+        get_connection("/data/warehouse.db", profile="batch-report")
+
+        config = mock_connect.call_args[1]["config"]
+        assert config["temp_directory"] == "/data/warehouse.db.batch-report.tmp"
+
+    @patch.dict(os.environ, {"WAREHOUSE_BATCH_REPORT_TEMP_DIRECTORY": "/mnt/spill"})
+    @patch('equalexperts_dataeng_exercise.db.duckdb.connect')
+    def test_get_connection_keeps_configured_batch_report_temp_directory(self, mock_connect):
+        get_connection("/data/warehouse.db", profile="batch-report")
+
+        assert mock_connect.call_args[1]["config"]["temp_directory"] == "/mnt/spill"
+
+
+class TestGetProfileConfig(unittest.TestCase):
+
+    def test_get_profile_config_with_unknown_profile_raises_value_error(self):
+        with self.assertRaises(ValueError) as context:
+            get_profile_config("unknown")
+        assert "Unknown resource profile unknown" in str(context.exception)
+
+    @patch.dict(os.environ, {"WAREHOUSE_INTERACTIVE_MEMORY_LIMIT": "256MB", "WAREHOUSE_INTERACTIVE_TEMP_DIRECTORY": "spill"})
+    def test_get_profile_config_reads_overrides_from_environment(self):
+        config = get_profile_config(INTERACTIVE_PROFILE)
+
+        assert config["memory_limit"] == "256MB"
+        assert config["temp_directory"] == "spill"
+        assert config["threads"] == "2"
+
+    @patch.dict(os.environ, {"WAREHOUSE_BATCH_REPORT_THREADS": "3"})
+    def test_get_profile_config_maps_profile_name_to_environment_prefix(self):
+        assert get_profile_config("batch-report")["threads"] == "3"
+
+    def test_batch_report_profile_caps_memory(self):
+        config = get_profile_config("batch-report")
+
+        assert config["memory_limit"] == "2GB"
+        assert config != get_profile_config(INGEST_PROFILE)
+
+    def test_get_profile_config_does_not_change_profile_defaults(self):
+        get_profile_config(INGEST_PROFILE)["threads"] = "1"
+
+        assert "threads" not in get_profile_config(INGEST_PROFILE)
+
+
+class TestSqlString(unittest.TestCase):
+
+    def test_sql_string_doubles_single_quotes(self):
+        assert sql_string("/data/o'brien.parquet") == "'/data/o''brien.parquet'"
+
 
 class TestSetupSchemaAndTable(unittest.TestCase):
 
@@ -48,6 +121,26 @@ class TestSetupSchemaAndTable(unittest.TestCase):
         assert "vote_type_id INTEGER" in sql_call
         assert "bounty_amount DOUBLE" in sql_call
         assert "creation_date TIMESTAMP NOT NULL" in sql_call
+
+    def test_setup_schema_and_table_creates_change_log_tables(self):
+        mock_conn = Mock()
+
+        setup_schema_and_table(mock_conn)
+
+        sql_call = mock_conn.sql.call_args[0][0]
+        assert f"{SCHEMA_NAME}.{CHANGES_TABLE_NAME} (" in sql_call
+        assert f"{SCHEMA_NAME}.{CHANGES_CONSUMERS_TABLE_NAME} (" in sql_call
+        assert "old_creation_date TIMESTAMP" in sql_call
+
+    def test_setup_schema_and_table_creates_archive_partitions_table(self):
+        mock_conn = Mock()
+
+        setup_schema_and_table(mock_conn)
+
+        sql_call = mock_conn.sql.call_args[0][0]
+        assert f"{SCHEMA_NAME}.{ARCHIVE_PARTITIONS_TABLE_NAME} (" in sql_call
+        assert "min_id STRING NOT NULL" in sql_call
+        assert "max_id STRING NOT NULL" in sql_call
     
     def test_setup_schema_and_table_uses_if_not_exists_clauses(self):
         mock_conn = Mock()
@@ -0,0 +1,174 @@
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import duckdb
+
+from equalexperts_dataeng_exercise.db import SCHEMA_NAME, MAIN_TABLE_NAME
+from equalexperts_dataeng_exercise.export import (
+    build_source_query,
+    export_to_file,
+    export_to_stream,
+    start_export,
+    validate_export_format,
+    validate_partitioning,
+    validate_pyarrow_available,
+    validate_stdout,
+    STDOUT_PATH
+)
+from equalexperts_dataeng_exercise.ingest import start_ingestion
+from tests.db_test import WAREHOUSE_PATH
+
+SAMPLE_FILE_PATH = "tests/test-resources/samples-votes.jsonl"
+SAMPLE_ROW_COUNT = 16
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+class TestValidateExportFormat(unittest.TestCase):
+
+    def test_validate_export_format_with_supported_formats_passes(self):
+        for export_format in ["parquet", "arrow", "csv"]:
+            validate_export_format(export_format)
+
+    def test_validate_export_format_with_unknown_format_raises_value_error(self):
+        with self.assertRaises(ValueError) as context:
+            validate_export_format("xlsx")
+        assert "Unsupported export format xlsx" in str(context.exception)
+
+
+class TestValidatePartitioning(unittest.TestCase):
+
+    def test_validate_partitioning_with_stdout_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            validate_partitioning(STDOUT_PATH, ["year"])
+
+    def test_validate_partitioning_without_columns_passes_for_stdout(self):
+        validate_partitioning(STDOUT_PATH, None)
+
+
+class TestValidateStdout(unittest.TestCase):
+
+    def test_validate_stdout_with_binary_format_to_terminal_raises_value_error(self):
+        for export_format in ["parquet", "arrow"]:
+            with self.assertRaises(ValueError) as context:
+                validate_stdout(STDOUT_PATH, export_format, True)
+            assert f"Refusing to write {export_format} to a terminal" in str(context.exception)
+
+    def test_validate_stdout_passes_for_csv_redirects_and_files(self):
+        validate_stdout(STDOUT_PATH, "csv", True)
+        validate_stdout(STDOUT_PATH, "parquet", False)
+        validate_stdout("votes.parquet", "parquet", True)
+
+
+class TestValidatePyarrowAvailable(unittest.TestCase):
+
+    @patch("importlib.util.find_spec", return_value=None)
+    def test_validate_pyarrow_available_without_pyarrow_raises_value_error(self, _):
+        for output_path, export_format in [(STDOUT_PATH, "parquet"), (STDOUT_PATH, "arrow"), ("votes.arrow", "arrow")]:
+            with self.assertRaises(ValueError) as context:
+                validate_pyarrow_available(output_path, export_format)
+            assert "requires pyarrow" in str(context.exception)
+
+    @patch("importlib.util.find_spec", return_value=None)
+    def test_validate_pyarrow_available_without_pyarrow_passes_for_copy_and_csv(self, _):
+        validate_pyarrow_available("votes.parquet", "parquet")
+        validate_pyarrow_available("votes.csv", "csv")
+        validate_pyarrow_available(STDOUT_PATH, "csv")
+
+
+class TestBuildSourceQuery(unittest.TestCase):
+
+    def test_build_source_query_with_name_selects_from_schema(self):
+        assert build_source_query(MAIN_TABLE_NAME) == f"SELECT * FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME}"
+
+    def test_build_source_query_with_query_returns_it_unchanged(self):
+        query = "SELECT id FROM blog_analysis.votes"
+        assert build_source_query(query) == query
+
+
+class TestExportToFile(unittest.TestCase):
+
+    def test_export_to_file_uses_copy_with_partitioning(self):
+        mock_conn = Mock()
+        export_to_file(mock_conn, "SELECT 1", "out", "parquet", ["year", "week_number"])
+
+        mock_conn.execute.assert_called_once()
+        sql_call = mock_conn.execute.call_args[0][0]
+
+        assert "COPY (SELECT 1) TO 'out'" in sql_call
+        assert "FORMAT parquet" in sql_call
+        assert "PARTITION_BY (year, week_number)" in sql_call
+
+    def test_export_to_file_writes_csv_header(self):
+        mock_conn = Mock()
+        export_to_file(mock_conn, "SELECT 1", "out.csv", "csv")
+
+        sql_call = mock_conn.execute.call_args[0][0]
+        assert "HEADER true" in sql_call
+        assert "PARTITION_BY" not in sql_call
+
+
+class TestExportIntegration(unittest.TestCase):
+
+    def setUp(self):
+        if os.path.exists(WAREHOUSE_PATH):
+            os.remove(WAREHOUSE_PATH)
+        start_ingestion(WAREHOUSE_PATH, SAMPLE_FILE_PATH)
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        if os.path.exists(WAREHOUSE_PATH):
+            os.remove(WAREHOUSE_PATH)
+        shutil.rmtree(self.output_dir)
+
+    def _count_rows(self, file_glob: str) -> int:
+        return duckdb.sql(f"SELECT COUNT(*) FROM '{file_glob}'").fetchall()[0][0]
+
+    def test_export_votes_to_parquet(self):
+        output_path = os.path.join(self.output_dir, "votes.parquet")
+        start_export(WAREHOUSE_PATH, MAIN_TABLE_NAME, output_path, "parquet")
+        assert self._count_rows(output_path) == SAMPLE_ROW_COUNT
+
+    def test_export_votes_to_path_with_quote(self):
+        output_path = os.path.join(self.output_dir, "o'brien.parquet")
+        start_export(WAREHOUSE_PATH, MAIN_TABLE_NAME, output_path, "parquet")
+        assert os.listdir(self.output_dir) == ["o'brien.parquet"]
+
+    def test_export_votes_to_partitioned_parquet(self):
+        start_export(WAREHOUSE_PATH, MAIN_TABLE_NAME, self.output_dir, "parquet", ["vote_type_id"])
+        assert sorted(os.listdir(self.output_dir)) == ["vote_type_id=2", "vote_type_id=3"]
+        assert self._count_rows(os.path.join(self.output_dir, "*", "*.parquet")) == SAMPLE_ROW_COUNT
+
+    def test_export_query_to_csv(self):
+        output_path = os.path.join(self.output_dir, "votes.csv")
+        start_export(WAREHOUSE_PATH, f"SELECT id FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME} WHERE post_id = '1'",
+                     output_path, "csv")
+        with open(output_path, encoding="utf-8") as exported:
+            lines = exported.read().splitlines()
+        assert lines[0] == "id"
+        assert len(lines) == 6
+
+    def test_export_csv_to_stream(self):
+        stream = io.BytesIO()
+        with duckdb.connect(WAREHOUSE_PATH, read_only=True) as conn:
+            export_to_stream(conn, f"SELECT id, post_id FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME} ORDER BY id LIMIT 2",
+                             stream, "csv")
+        assert stream.getvalue().decode("utf-8").splitlines() == ["id,post_id", "1,1", "10,2"]
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_export_votes_to_arrow_file_and_stream(self):
+        import pyarrow.ipc
+
+        output_path = os.path.join(self.output_dir, "votes.arrow")
+        start_export(WAREHOUSE_PATH, MAIN_TABLE_NAME, output_path, "arrow")
+        assert pyarrow.ipc.open_file(output_path).read_all().num_rows == SAMPLE_ROW_COUNT
+
+        stream = io.BytesIO()
+        with duckdb.connect(WAREHOUSE_PATH, read_only=True) as conn:
+            export_to_stream(conn, build_source_query(MAIN_TABLE_NAME), stream, "arrow")
+        stream.seek(0)
+        assert pyarrow.ipc.open_stream(stream).read_all().num_rows == SAMPLE_ROW_COUNT
@@ -2,6 +2,7 @@ import unittest
 import os
 import subprocess
 import json
+import tempfile
 import duckdb
 from unittest.mock import Mock, patch
 
@@ -16,7 +17,8 @@ from equalexperts_dataeng_exercise.ingest import (
     ingest_data,
     STAGE_TABLE_NAME
 )
-from equalexperts_dataeng_exercise.db import SCHEMA_NAME, MAIN_TABLE_NAME
+from equalexperts_dataeng_exercise.db import SCHEMA_NAME, MAIN_TABLE_NAME, CHANGES_TABLE_NAME, \
+    get_connection
 from tests.db_test import WAREHOUSE_PATH
 
 
@@ -65,11 +67,12 @@ class TestUpdateMainTableFromStageTable(unittest.TestCase):
 
     def test_update_main_table_from_stage_table_executes_correct_sql(self):
         mock_conn = Mock()
+        mock_conn.execute.return_value.fetchall.return_value = []
         update_main_table_from_stage_table(mock_conn)
         
-        mock_conn.execute.assert_called_once()
         sql_call = mock_conn.execute.call_args[0][0]
         
+        assert f"INSERT INTO {SCHEMA_NAME}.{CHANGES_TABLE_NAME}" in sql_call
         assert f"INSERT OR REPLACE INTO {SCHEMA_NAME}.{MAIN_TABLE_NAME}" in sql_call
         assert f"FROM {SCHEMA_NAME}.{STAGE_TABLE_NAME}" in sql_call
         assert "id, user_id, post_id, vote_type_id, bounty_amount, creation_date" in sql_call
@@ -145,6 +148,27 @@ class TestIngestionIntegration(unittest.TestCase):
         else:
             self.fail("Database file was not created during ingestion")
 
+    def test_ingestion_replaces_existing_records_across_loads(self):
+        start_ingestion(WAREHOUSE_PATH, "tests/test-resources/samples-votes.jsonl")
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as updates:
+            updates.write('{"Id":"7","PostId":"6","VoteTypeId":"2","CreationDate":"2022-01-16T00:00:00.000"}\n')
+            updates.write('{"Id":"100","PostId":"6","VoteTypeId":"2","CreationDate":"2022-01-16T00:00:00.000"}\n')
+        try:
+            start_ingestion(WAREHOUSE_PATH, updates.name)
+        finally:
+            os.remove(updates.name)
+
+        with duckdb.connect(WAREHOUSE_PATH, read_only=True) as conn:
+            count, distinct_ids = conn.sql(
+                f"SELECT COUNT(*), COUNT(DISTINCT id) FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME}"
+            ).fetchall()[0]
+            post_id = conn.sql(
+                f"SELECT post_id FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME} WHERE id = '7'"
+            ).fetchall()[0][0]
+        assert count == distinct_ids
+        assert count == 17
+        assert post_id == "6"
+
     def test_ingestion_fails_when_file_not_exists(self):
         result = subprocess.run(
             args=[
@@ -12,7 +12,8 @@ from equalexperts_dataeng_exercise.outliers import (
     SCHEMA_NAME,
     MAIN_TABLE_NAME, compute_outliers
 )
-from equalexperts_dataeng_exercise.db import get_connection, setup_schema_and_table
+from equalexperts_dataeng_exercise.db import get_connection, setup_schema_and_table, table_exists, \
+    WEEKLY_ROLLUP_TABLE_NAME, CHANGES_TABLE_NAME
 from tests.db_test import WAREHOUSE_PATH
 
 
@@ -33,6 +34,15 @@ class TestCreateOutliersView(unittest.TestCase):
         assert "GROUP BY year, week_number" in sql_call
         assert "ORDER BY year, week_number ASC" in sql_call
         assert f"WHERE abs(1 - total_votes / avg) > {OUTLIER_THRESHOLD}" in sql_call
+        assert f"FROM {SCHEMA_NAME}.{WEEKLY_ROLLUP_TABLE_NAME}" in sql_call
+
+    def test_create_outliers_view_without_rollup_reads_only_votes(self):
+        mock_conn = Mock()
+        create_outliers_view(mock_conn, include_rollup=False)
+
+        sql_call = mock_conn.execute.call_args[0][0]
+        assert f"FROM {SCHEMA_NAME}.{MAIN_TABLE_NAME}" in sql_call
+        assert WEEKLY_ROLLUP_TABLE_NAME not in sql_call
 
 
 class TestOutliersIntegration(unittest.TestCase):
@@ -73,6 +83,22 @@ class TestOutliersIntegration(unittest.TestCase):
             assert result == []
 
 
+    def test_compute_outliers_does_not_create_tables(self):
+        with get_connection(WAREHOUSE_PATH) as conn:
+            conn.execute(f"""
+                CREATE SCHEMA {SCHEMA_NAME};
+                CREATE TABLE {SCHEMA_NAME}.{MAIN_TABLE_NAME} AS
+                SELECT '1' AS id, TIMESTAMP '2022-01-01 00:00:00' AS creation_date;
+            """)
+
+        compute_outliers(WAREHOUSE_PATH)
+
+        with get_connection(WAREHOUSE_PATH) as conn:
+            assert not table_exists(conn, WEEKLY_ROLLUP_TABLE_NAME)
+            assert not table_exists(conn, CHANGES_TABLE_NAME)
+            assert conn.execute(f"SELECT * FROM {SCHEMA_NAME}.{OUTLIER_WEEKS_VIEW_NAME}").fetchall() == []
+
+
 class TestOutlierCalculationIntegration(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from equalexperts_dataeng_exercise.ingest import start_ingestion
+from tests.db_test import WAREHOUSE_PATH
+
+HEAVY_MODULES = ["duckdb", "pandas", "numpy", "requests"]
+
+
+def _loaded_modules_after(code: str) -> list[str]:
+    check = f"import sys\n{code}\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        args=[sys.executable, "-c", check],
+        capture_output=True,
+        text=True,
+    )
+    result.check_returncode()
+    return [module for module in result.stdout.strip().split(",") if module]
+
+
+class TestCliStartup(unittest.TestCase):
+
+    def test_importing_cli_does_not_load_heavy_modules(self):
+        loaded = _loaded_modules_after("import equalexperts_dataeng_exercise.scripts.exercise")
+        assert loaded == [], f"CLI import loaded {loaded}"
+
+
+class TestDetectOutliersStartup(unittest.TestCase):
+
+    def setUp(self):
+        if os.path.exists(WAREHOUSE_PATH):
+            os.remove(WAREHOUSE_PATH)
+        start_ingestion(WAREHOUSE_PATH, "tests/test-resources/samples-votes.jsonl")
+
+    def tearDown(self):
+        if os.path.exists(WAREHOUSE_PATH):
+            os.remove(WAREHOUSE_PATH)
+
+    def test_compute_outliers_does_not_load_pandas(self):
+        loaded = _loaded_modules_after(
+            "from equalexperts_dataeng_exercise.outliers import compute_outliers\n"
+            f"compute_outliers({WAREHOUSE_PATH!r})"
+        )
+        assert "pandas" not in loaded
+        assert "numpy" not in loaded